@@ -9,7 +9,7 @@ Defines the digital twin components for the AODT simulation.
 from typing import List
 import numpy as np
 
-from .phy import Antenna, compute_cfr
+from .phy import Antenna
 
 class RU:
     """Represents a Radio Unit (base station)."""
@@ -63,16 +63,21 @@ class Scenario:
             print("Warning: RUs or UEs list is empty. Returning an empty matrix.")
             return np.array([[]])
 
-        num_rus = len(self.rus)
-        num_ues = len(self.ues)
-        self.channel_matrix = np.zeros((num_ues, num_rus))
+        # Stack positions and per-RU antenna properties so that every UE-RU pair
+        # is evaluated in a single broadcasted expression.
+        ue_positions = np.stack([ue.position for ue in self.ues])   # (U, 3)
+        ru_positions = np.stack([ru.position for ru in self.rus])   # (R, 3)
+        ru_k = np.array([ru.antenna.k_factor for ru in self.rus])  # (R,)
+
+        # Squared distance matrix between every UE and every RU, shape (U, R)
+        diff = ue_positions[:, None, :] - ru_positions[None, :, :]
+        distance_sq = np.einsum('...i,...i->...', diff, diff)
+
+        # Same FSPL model as compute_cfr, applied element-wise
+        with np.errstate(divide='ignore'):
+            channel = ru_k[None, :] / distance_sq
+        self.channel_matrix = np.where(distance_sq == 0, 1.0, channel)
 
-        for i, ue in enumerate(self.ues):
-            for j, ru in enumerate(self.rus):
-                # Compute the channel gain for the current UE-RU pair
-                cfr = compute_cfr(ru.position, ue.position, ru.antenna)
-                self.channel_matrix[i, j] = cfr
-        
         return self.channel_matrix
 
 if __name__ == '__main__':
@@ -5,11 +5,23 @@ Defines the physical layer components for the AODT simulation.
 - compute_cfr: Simulates channel frequency response between a base station and a user.
 """
 
+import math
 import numpy as np
 
+# (c / (4*pi))^2, the frequency-independent constant of the linear FSPL model:
+# (lambda / (4*pi*d))^2 == C_OVER_4PI_SQ / (f^2 * d^2)
+C_OVER_4PI_SQ = (3.0e8 / (4.0 * np.pi)) ** 2
+
+# ln(10) / 10, so that 10^(x/10) == exp(x * _LN10_OVER_10)
+_LN10_OVER_10 = math.log(10) / 10.0
+
+def db_to_linear(value_db: float) -> float:
+    """Converts a dB value to a linear scale, i.e. 10^(value_db/10), using exp instead of pow."""
+    return math.exp(value_db * _LN10_OVER_10)
+
 class Antenna:
     """Represents a 5G antenna with configurable properties."""
-    def __init__(self, freq: float, elements: int, gain_dbi: float = 15.0):
+    def __init__(self, freq: float, elements: int, gain_dbi: float = 15.0, validate: bool = True):
         """
         Initializes the Antenna object.
 
@@ -17,15 +29,24 @@ class Antenna:
             freq (float): The operating frequency in GHz (e.g., 2.4, 3.5, 5.8).
             elements (int): The number of antenna elements.
             gain_dbi (float): The antenna gain in dBi (decibels relative to isotropic).
+            validate (bool): Whether to check that freq and elements are within range.
+                Callers that already clip their inputs (e.g. PSO decoding) can skip it.
         """
-        if not (2 <= freq <= 6):
-            raise ValueError("Frequency must be between 2 and 6 GHz.")
-        if not (1 <= elements <= 8):
-            raise ValueError("Antenna elements must be between 1 and 8.")
+        if validate:
+            if not (2 <= freq <= 6):
+                raise ValueError("Frequency must be between 2 and 6 GHz.")
+            if not (1 <= elements <= 8):
+                raise ValueError("Antenna elements must be between 1 and 8.")
         
         self.freq = freq
         self.elements = elements
         self.gain_dbi = gain_dbi
+        self.gain_linear = db_to_linear(gain_dbi)
+
+        # Distance-independent part of the channel gain: (lambda / (4*pi))^2 * gain * elements.
+        # The channel gain at squared distance d^2 is then simply k_factor / d^2.
+        freq_hz = freq * 1e9
+        self.k_factor = C_OVER_4PI_SQ * self.gain_linear * elements / (freq_hz * freq_hz)
 
 def compute_cfr(bs_pos: np.ndarray, ue_pos: np.ndarray, antenna: Antenna) -> float:
     """
@@ -43,35 +64,17 @@ def compute_cfr(bs_pos: np.ndarray, ue_pos: np.ndarray, antenna: Antenna) -> flo
     Returns:
         float: The channel gain (a linear magnitude value > 0).
     """
-    # Speed of light in m/s
-    c = 3.0e8
-    
-    # Distance between base station and user
-    distance = np.linalg.norm(bs_pos - ue_pos)
-    if distance == 0:
+    # Squared distance between base station and user; FSPL only needs d^2,
+    # so there is no need to take the square root
+    diff = bs_pos - ue_pos
+    distance_sq = np.dot(diff, diff)
+    if distance_sq == 0:
         return 1.0  # Avoid division by zero; max signal strength
 
-    # Frequency in Hz
-    freq_hz = antenna.freq * 1e9
-    
-    # Wavelength in meters
-    wavelength = c / freq_hz
-    
-    # Calculate Free-Space Path Loss (FSPL) in dB
-    # FSPL = 20 * log10(d) + 20 * log10(f) + 20 * log10(4*pi/c)
-    # Simplified FSPL in linear scale: (lambda / (4 * pi * d))^2
-    path_loss_linear = (wavelength / (4 * np.pi * distance)) ** 2
-    
-    # Convert antenna gain from dBi to a linear scale
-    # P_linear = 10^(P_db/10)
-    gain_linear = 10 ** (antenna.gain_dbi / 10.0)
-    
-    # Effective gain considering the number of elements (simple linear scaling)
-    # This is a simplification; in reality, this would involve beamforming patterns.
-    effective_gain = gain_linear * antenna.elements
-
-    # The final channel gain is the product of path loss and antenna gain
-    channel_gain = path_loss_linear * effective_gain
+    # Simplified FSPL in linear scale: (lambda / (4 * pi * d))^2 = lambda^2 / (16 * pi^2 * d^2),
+    # multiplied by the effective antenna gain (gain_linear * elements). Everything except
+    # 1 / d^2 is constant for the antenna and precomputed in Antenna.k_factor.
+    channel_gain = antenna.k_factor / distance_sq
     
     return channel_gain
 
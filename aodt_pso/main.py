@@ -9,14 +9,35 @@ This script orchestrates the entire optimization pipeline:
 """
 import sys
 import os
+import math
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Numba is optional; without it the fitness falls back to the pure NumPy path
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for `numba.njit` when Numba is not installed."""
+        return lambda func: func
+
+# CuPy is optional; it is only used for large swarms (see GPU_MIN_ELEMENTS)
+try:
+    import cupy as cp
+    CUPY_AVAILABLE = True
+except ImportError:
+    cp = None
+    CUPY_AVAILABLE = False
+
 # Ensure modules are found
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from aerial.phy import Antenna
-from aerial.dt import RU, UE, Scenario
+from aerial.phy import Antenna, C_OVER_4PI_SQ, db_to_linear
+from aerial.dt import RU
 from optimizer.pso import PSO
 from simulation.signal_map import generate_ue_distribution
 from visualization.plot_3d import plot_scene
@@ -27,56 +48,133 @@ RU_Z_BOUNDS = (10.0, 50.0) # Z-bounds for RU height optimization
 UE_HEIGHT = 1.5
 NUM_RUS = 3
 NUM_UES = 200
+PARAMS_PER_RU = 5  # x, y, z, freq, elements
+ANTENNA_GAIN_DBI = 15.0  # Gain used by every RU antenna (matches the Antenna default)
+ANTENNA_GAIN_LINEAR = db_to_linear(ANTENNA_GAIN_DBI)
+# 1 / k == f^2 / elements * _INV_K_CONST for every swarm RU
+_INV_K_CONST = 1.0 / (C_OVER_4PI_SQ * ANTENNA_GAIN_LINEAR)
 
 # --- PSO Parameters ---
 PSO_TOPOLOGY = 'gbest'  # 'gbest' or 'lbest'
 NUM_PARTICLES = 50
 MAX_ITER = 100
+# Evaluate fitness on the GPU when NUM_PARTICLES * NUM_UES * NUM_RUS reaches this size
+GPU_MIN_ELEMENTS = 100_000
 OUTPUT_CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pso_optimization_log.csv')
 
 def parse_pso_solution(solution: np.ndarray, num_rus: int):
     """Parses a flat solution vector from PSO into a list of RU objects."""
-    params_per_ru = 5  # x, y, z, freq, elements
     rus = []
-    solution_reshaped = solution.reshape((num_rus, params_per_ru))
+    solution_reshaped = solution.reshape((num_rus, PARAMS_PER_RU))
     
     for params in solution_reshaped:
         pos = np.array([params[0], params[1], params[2]])
-        freq = params[3]
-        elements = int(round(params[4]))
-        elements = np.clip(elements, 1, 8)
-        ant = Antenna(freq=freq, elements=elements)
+        # Clip to the antenna's valid ranges so no validation is needed
+        freq = float(np.clip(params[3], 2.0, 6.0))
+        elements = int(np.clip(round(params[4]), 1, 8))
+        ant = Antenna(freq=freq, elements=elements, validate=False)
         rus.append(RU(position=pos, antenna=ant))
         
     return rus
 
-def objective_function_vectorized(particles: np.ndarray, ues: list, num_rus: int):
+def _ru_inv_k_factors(particles: np.ndarray, num_rus: int) -> np.ndarray:
+    """
+    Computes the inverse distance-independent channel factor of every RU in the swarm.
+
+    This is `1 / Antenna.k_factor` for a whole generation at once, so the per-pair
+    work reduces to `d^2 / k`. Clipping keeps every particle a valid configuration.
+
+    Returns:
+        np.ndarray: Array of shape (num_particles, num_rus).
+    """
+    params = particles.reshape((particles.shape[0], num_rus, PARAMS_PER_RU))
+    freq_hz = np.clip(params[:, :, 3], 2.0, 6.0) * 1e9
+    elements = np.clip(np.round(params[:, :, 4]), 1, 8)
+    return freq_hz * freq_hz * _INV_K_CONST / elements
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _fitness_kernel(particles: np.ndarray, ru_inv_k: np.ndarray, ue_positions: np.ndarray):
+    """
+    Fused Numba kernel for the swarm fitness.
+
+    Computes distance, FSPL, best-RU selection, log and sum in a single pass per
+    particle without materializing the (P, R, U) channel tensor. Particles are
+    evaluated in parallel.
+    """
+    num_particles, num_rus = ru_inv_k.shape
+    num_ues = ue_positions.shape[0]
+    fitness = np.empty(num_particles)
+
+    for p in prange(num_particles):
+        total = 0.0
+        for u in range(num_ues):
+            # Best RU = smallest inverse channel gain d^2 / k. The first RU seeds
+            # the minimum: fastmath assumes no infinities, so np.inf is no sentinel
+            best = 0.0
+            for r in range(num_rus):
+                base = r * PARAMS_PER_RU
+                dx = particles[p, base] - ue_positions[u, 0]
+                dy = particles[p, base + 1] - ue_positions[u, 1]
+                dz = particles[p, base + 2] - ue_positions[u, 2]
+                distance_sq = dx * dx + dy * dy + dz * dz
+                if distance_sq == 0:
+                    inv_channel = 1.0
+                else:
+                    inv_channel = distance_sq * ru_inv_k[p, r]
+                if r == 0 or inv_channel < best:
+                    best = inv_channel
+            total += math.log10(best)
+        fitness[p] = total
+
+    return fitness
+
+def _fitness_array(particles, ru_inv_k, ue_positions, xp=np):
+    """
+    Array-API implementation of the swarm fitness.
+
+    The whole generation is evaluated as a single (particles, RUs, UEs) tensor
+    using the same FSPL model as `compute_cfr`, so no per-particle `Scenario`
+    is constructed. `xp` is the array module the inputs live in (NumPy or CuPy).
+    """
+    num_particles, num_rus = ru_inv_k.shape
+    ru_pos = particles.reshape((num_particles, num_rus, PARAMS_PER_RU))[:, :, 0:3]  # (P, R, 3)
+
+    # Squared distance from every RU of every particle to every UE, shape (P, R, U)
+    diff = ru_pos[:, :, None, :] - ue_positions[None, None, :, :]
+    distance_sq = xp.einsum('...i,...i->...', diff, diff)
+
+    # Inverse channel gain d^2 / k; zero distance yields a unit gain, as in compute_cfr
+    inv_channel = xp.where(distance_sq == 0, 1.0, distance_sq * ru_inv_k[:, :, None])
+
+    # For each UE, the best RU is the one with the smallest inverse gain
+    best_inv_channel = xp.min(inv_channel, axis=1)             # (P, U)
+
+    # -sum(log10(gain)) == sum(log10(1 / gain)); the inverse gain is never 0,
+    # so no epsilon is needed
+    return xp.sum(xp.log10(best_inv_channel), axis=1)
+
+def objective_function_vectorized(particles: np.ndarray, ue_positions: np.ndarray, num_rus: int):
     """
     Vectorized objective function for PSO.
     
     Evaluates the fitness for an entire swarm of particles simultaneously.
     Fitness is the negative of the sum of log-signal quality. Lower is better.
+    `ue_positions` is the (num_ues, 3) array returned by `generate_ue_distribution`.
+
+    If `ue_positions` is a CuPy array the fitness tensor is evaluated on the GPU;
+    only the swarm is uploaded and the fitness vector downloaded per call.
+    Otherwise the fused Numba kernel is used when Numba is installed, falling
+    back to the NumPy tensor implementation.
     """
-    num_particles = particles.shape[0]
-    fitness_scores = np.zeros(num_particles)
-
-    for i in range(num_particles):
-        try:
-            # Create a scenario for each particle
-            rus = parse_pso_solution(particles[i], num_rus)
-            scenario = Scenario(rus=rus, ues=ues)
-            channel_matrix = scenario.run()
-            
-            # For each UE, find the signal from the best RU
-            max_signal_per_ue = np.max(channel_matrix, axis=1)
-            
-            # Sum of log-signal quality. Epsilon avoids log(0).
-            total_signal_quality = np.sum(np.log10(max_signal_per_ue + 1e-12))
-            fitness_scores[i] = -total_signal_quality
-        except (ValueError, IndexError):
-            fitness_scores[i] = 1e9 # Assign a high penalty for invalid particles
-    
-    return fitness_scores
+    # Both implementations work on d^2 / k, which turns the per-pair divide
+    # into a multiply and the max/negate into a min
+    ru_inv_k = _ru_inv_k_factors(particles, num_rus)
+    if CUPY_AVAILABLE and cp.get_array_module(ue_positions) is cp:
+        fitness = _fitness_array(cp.asarray(particles), cp.asarray(ru_inv_k), ue_positions, xp=cp)
+        return cp.asnumpy(fitness)
+    if NUMBA_AVAILABLE:
+        return _fitness_kernel(particles, ru_inv_k, ue_positions)
+    return _fitness_array(particles, ru_inv_k, ue_positions)
 
 def plot_convergence(log: dict):
     """Plots multiple convergence metrics from the PSO log."""
@@ -104,7 +202,7 @@ def plot_convergence(log: dict):
 
 if __name__ == "__main__":
     print("--- 1. Initializing Scenario ---")
-    ues = generate_ue_distribution(
+    ues, ue_positions = generate_ue_distribution(
         num_ues=NUM_UES,
         area_bounds=AREA_BOUNDS,
         ue_height=UE_HEIGHT
@@ -122,8 +220,15 @@ if __name__ == "__main__":
         ])
     num_dimensions = len(bounds)
 
-    # The objective function needs to be a lambda to pass the extra `ues` and `NUM_RUS` arguments
-    objective_func = lambda p: objective_function_vectorized(p, ues=ues, num_rus=NUM_RUS)
+    # Move the UEs to the GPU once if the swarm is large enough to benefit from it
+    fitness_ue_positions = ue_positions
+    use_gpu = CUPY_AVAILABLE and NUM_PARTICLES * NUM_UES * NUM_RUS >= GPU_MIN_ELEMENTS
+    if use_gpu:
+        print("Evaluating fitness on the GPU (CuPy).")
+        fitness_ue_positions = cp.asarray(ue_positions)
+
+    # The objective function needs to be a lambda to pass the extra `ue_positions` and `NUM_RUS` arguments
+    objective_func = lambda p: objective_function_vectorized(p, ue_positions=fitness_ue_positions, num_rus=NUM_RUS)
 
     pso = PSO(
         objective_func=objective_func,
@@ -152,6 +257,6 @@ if __name__ == "__main__":
     plot_convergence(pso_log)
 
     print("\n--- 5. Visualizing 3D Scene ---")
-    plot_scene(rus=optimized_rus, ues=ues, area_bounds=AREA_BOUNDS)
+    plot_scene(rus=optimized_rus, ues=ue_positions, area_bounds=AREA_BOUNDS)
 
     print("\n--- Simulation Complete ---") 
\ No newline at end of file
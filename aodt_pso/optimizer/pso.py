@@ -5,11 +5,12 @@ This module provides a more sophisticated PSO implementation with features like:
 - G-best (global) and L-best (local ring) topologies.
 - Stagnation detection and swarm diversification.
 - Dynamic and adaptive inertia weight calculation.
-- Vectorized fitness evaluation for efficiency.
+- Vectorized fitness evaluation for efficiency, optionally split across threads.
 - Comprehensive logging of optimization metrics.
 """
 import numpy as np
 from typing import Callable, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 import os
 import csv
 
@@ -29,7 +30,10 @@ class PSO:
                  c2: float = 2.05,
                  stagnation_patience: int = 15,
                  k: int = 3,
-                 log_to_csv: str = None):
+                 log_to_csv: str = None,
+                 seed: int = None,
+                 dtype: type = np.float32,
+                 num_workers: int = 1):
         """
         Initializes the PSO optimizer.
 
@@ -48,6 +52,10 @@ class PSO:
             stagnation_patience (int): Iterations to wait before diversification.
             k (int): The number of neighbors for the l-best topology (must be odd).
             log_to_csv (str, optional): Path to a CSV file to log results. Defaults to None.
+            seed (int, optional): Seed for the swarm's random number generator. Defaults to None.
+            dtype (type): Floating point type of the swarm state. Defaults to np.float32.
+            num_workers (int): Number of threads the swarm is split across for fitness
+                evaluation. Defaults to 1 (evaluate in the calling thread).
         """
         if topology not in ['gbest', 'lbest']:
             raise ValueError("Topology must be either 'gbest' or 'lbest'.")
@@ -56,7 +64,10 @@ class PSO:
 
         self.objective_func = objective_func
         self.num_dimensions = num_dimensions
-        self.bounds = np.array(bounds).T
+        self.dtype = dtype
+        b = np.asarray(bounds, dtype=self.dtype)
+        self.lo = np.ascontiguousarray(b[:, 0])
+        self.hi = np.ascontiguousarray(b[:, 1])
         self.num_particles = num_particles
         self.max_iter = max_iter
         self.topology = topology
@@ -66,14 +77,28 @@ class PSO:
         self.stagnation_patience = stagnation_patience
         self.k = k
         self.csv_log_path = log_to_csv
+        self._csv_fh = None
+        self._csv_writer = None
+        self.num_workers = max(1, min(num_workers, num_particles))
+        self._pool = ThreadPoolExecutor(max_workers=self.num_workers) if self.num_workers > 1 else None
+        self.rng = np.random.default_rng(seed)
+
+        # Ring neighborhood indices for the l-best topology, shape (num_particles, k)
+        half_k = self.k // 2
+        self._ring_idx = (np.arange(self.num_particles)[:, None] + np.arange(-half_k, half_k + 1)[None, :]) % self.num_particles
         
-        self.params_per_ru = 4
+        self.params_per_ru = 5  # x, y, z, freq, elements
         if self.num_dimensions % self.params_per_ru != 0:
-            raise ValueError("num_dimensions must be a multiple of parameters per RU (4).")
+            raise ValueError("num_dimensions must be a multiple of parameters per RU (5).")
         self.num_rus = self.num_dimensions // self.params_per_ru
 
         self._initialize_swarm()
 
+        # Scratch buffers reused by the velocity update to avoid per-iteration temporaries
+        self._r1_buf = np.empty((self.num_particles, self.num_dimensions), dtype=self.dtype)
+        self._r2_buf = np.empty((self.num_particles, self.num_dimensions), dtype=self.dtype)
+        self._tmp_buf = np.empty((self.num_particles, self.num_dimensions), dtype=self.dtype)
+
         # History and logging
         self.log: Dict[str, List[Any]] = {
             "gbest_fitness": [],
@@ -82,34 +107,60 @@ class PSO:
             "stagnation_resets": 0
         }
 
-        # If logging to CSV, ensure the header is present
+        # If logging to CSV, open the file once and ensure the header is present
         if self.csv_log_path:
             # Check if file exists and is empty to write header
             write_header = not os.path.exists(self.csv_log_path) or os.path.getsize(self.csv_log_path) == 0
-            if write_header:
-                try:
-                    with open(self.csv_log_path, 'w', newline='') as f:
-                        writer = csv.writer(f)
-                        writer.writerow(['iteration', 'ru_id', 'pos_x', 'pos_y', 'pos_z', 'frequency_ghz', 'elements', 'gbest_fitness_score'])
-                except IOError as e:
-                    print(f"Warning: Could not write header to CSV log file {self.csv_log_path}. Error: {e}")
-                    self.csv_log_path = None # Disable logging if header fails
+            try:
+                self._csv_fh = open(self.csv_log_path, 'a', newline='', buffering=1 << 16)
+                self._csv_writer = csv.writer(self._csv_fh)
+                if write_header:
+                    self._csv_writer.writerow(['iteration', 'ru_id', 'pos_x', 'pos_y', 'pos_z', 'frequency_ghz', 'elements', 'gbest_fitness_score'])
+            except IOError as e:
+                print(f"Warning: Could not open CSV log file {self.csv_log_path}. Error: {e}")
+                self.close()
+                self.csv_log_path = None # Disable logging if the file cannot be opened
+
+    def close(self):
+        """Flushes and closes the CSV log file and shuts down the worker threads."""
+        if self._csv_fh is not None:
+            self._csv_fh.close()
+            self._csv_fh = None
+            self._csv_writer = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _evaluate(self, positions: np.ndarray) -> np.ndarray:
+        """Evaluates the objective for a batch of positions, in parallel chunks if enabled."""
+        if self._pool is None:
+            return self.objective_func(positions)
+
+        # Each thread gets a contiguous block of particles
+        chunks = np.array_split(positions, self.num_workers)
+        results = list(self._pool.map(self.objective_func, chunks))
+        return np.concatenate(results)
+
+    def __del__(self):
+        # __init__ may have raised before the log file and pool attributes were set
+        if hasattr(self, '_pool'):
+            self.close()
 
     def _initialize_swarm(self):
         """Initializes the swarm's positions, velocities, and bests."""
         # Positions
-        self.swarm = self.bounds[0] + np.random.rand(self.num_particles, self.num_dimensions) * (self.bounds[1] - self.bounds[0])
+        self.swarm = np.ascontiguousarray(self.lo + self.rng.random((self.num_particles, self.num_dimensions), dtype=self.dtype) * (self.hi - self.lo))
         
         # Velocities
-        v_range = self.bounds[1] - self.bounds[0]
-        self.velocity = -v_range + 2 * v_range * np.random.rand(self.num_particles, self.num_dimensions)
+        v_range = self.hi - self.lo
+        self.velocity = -v_range + 2 * v_range * self.rng.random((self.num_particles, self.num_dimensions), dtype=self.dtype)
         
         # Personal and global bests
         self.pbest_pos = self.swarm.copy()
-        self.pbest_fitness = self.objective_func(self.pbest_pos)
+        self.pbest_fitness = self._evaluate(self.pbest_pos)
         
         self.gbest_idx = np.argmin(self.pbest_fitness)
-        self.gbest_pos = self.pbest_pos[self.gbest_idx].copy()
+        self.gbest_pos = self.pbest_pos[self.gbest_idx]
         self.gbest_fitness = self.pbest_fitness[self.gbest_idx]
         
         # Stagnation tracking
@@ -121,63 +172,64 @@ class PSO:
         if self.topology == 'gbest':
             return self.gbest_pos
         
-        # L-best (ring topology)
-        social_best = np.zeros_like(self.pbest_pos)
-        half_k = self.k // 2
-        
-        for i in range(self.num_particles):
-            # Define neighbors with wrap-around
-            indices = [(i + j) % self.num_particles for j in range(-half_k, half_k + 1)]
-            
-            # Find the best in the neighborhood
-            best_neighbor_idx = indices[np.argmin(self.pbest_fitness[indices])]
-            social_best[i] = self.pbest_pos[best_neighbor_idx]
-            
-        return social_best
+        # L-best (ring topology): find the best neighbor of every particle at once
+        neighbor_fitness = self.pbest_fitness[self._ring_idx]
+        best_neighbor_idx = self._ring_idx[np.arange(self.num_particles), np.argmin(neighbor_fitness, axis=1)]
+        return self.pbest_pos[best_neighbor_idx]
 
     def _log_to_csv(self, iteration: int):
         """Appends the current global best solution to the CSV log file."""
-        if not self.csv_log_path:
+        if self._csv_writer is None:
             return
             
         solution_reshaped = self.gbest_pos.reshape((self.num_rus, self.params_per_ru))
+        fitness = f"{self.gbest_fitness:.4f}"
         
         try:
-            with open(self.csv_log_path, 'a', newline='') as f:
-                writer = csv.writer(f)
-                for ru_idx, params in enumerate(solution_reshaped):
-                    row = [
-                        iteration,
-                        ru_idx + 1,
-                        f"{params[0]:.2f}",
-                        f"{params[1]:.2f}",
-                        f"{params[2]:.2f}",
-                        f"{params[3]:.2f}",
-                        int(round(params[4])),
-                        f"{self.gbest_fitness:.4f}"
-                    ]
-                    writer.writerow(row)
+            self._csv_writer.writerows([
+                (
+                    iteration,
+                    ru_idx + 1,
+                    f"{params[0]:.2f}",
+                    f"{params[1]:.2f}",
+                    f"{params[2]:.2f}",
+                    f"{params[3]:.2f}",
+                    int(round(params[4])),
+                    fitness
+                )
+                for ru_idx, params in enumerate(solution_reshaped)
+            ])
         except IOError as e:
             print(f"Warning: Could not write to CSV log file {self.csv_log_path}. Error: {e}")
 
     def _update_velocity_and_position(self, iteration: int):
         """Updates particle velocities and positions."""
-        r1 = np.random.rand(self.num_particles, self.num_dimensions)
-        r2 = np.random.rand(self.num_particles, self.num_dimensions)
+        r1 = self.rng.random(dtype=self.dtype, out=self._r1_buf)
+        r2 = self.rng.random(dtype=self.dtype, out=self._r2_buf)
         
         social_best = self._get_social_best()
         
-        cognitive_velocity = self.c1 * r1 * (self.pbest_pos - self.swarm)
-        social_velocity = self.c2 * r2 * (social_best - self.swarm)
-        
         # Dynamic inertia decay
         w = self.w_range[0] - (self.w_range[0] - self.w_range[1]) * (iteration / self.max_iter)
         
-        self.velocity = w * self.velocity + cognitive_velocity + social_velocity
+        # v = w * v + c1 * r1 * (pbest - x) + c2 * r2 * (social_best - x), computed in place
+        tmp = self._tmp_buf
+        self.velocity *= w
+
+        np.subtract(self.pbest_pos, self.swarm, out=tmp)
+        tmp *= r1
+        tmp *= self.c1
+        self.velocity += tmp
+
+        np.subtract(social_best, self.swarm, out=tmp)
+        tmp *= r2
+        tmp *= self.c2
+        self.velocity += tmp
+
         self.swarm += self.velocity
         
         # Boundary clipping
-        self.swarm = np.clip(self.swarm, self.bounds[0], self.bounds[1])
+        np.clip(self.swarm, self.lo, self.hi, out=self.swarm)
 
     def _diversify_if_stagnated(self):
         """Checks for stagnation and re-initializes part of the swarm if needed."""
@@ -198,11 +250,11 @@ class PSO:
             worst_indices = fitness_ranks[self.num_particles // 2:]
             
             # Ensure gbest is not reset
-            worst_indices = np.setdiff1d(worst_indices, [self.gbest_idx])
+            worst_indices = worst_indices[worst_indices != self.gbest_idx]
 
             # Generate new positions and reset velocities for these particles
             num_to_reset = len(worst_indices)
-            self.swarm[worst_indices] = self.bounds[0] + np.random.rand(num_to_reset, self.num_dimensions) * (self.bounds[1] - self.bounds[0])
+            self.swarm[worst_indices] = self.lo + self.rng.random((num_to_reset, self.num_dimensions), dtype=self.dtype) * (self.hi - self.lo)
             self.velocity[worst_indices] = 0
 
     def _log_metrics(self):
@@ -212,7 +264,8 @@ class PSO:
 
         # Swarm diversity (average distance from swarm centroid)
         centroid = np.mean(self.swarm, axis=0)
-        diversity = np.mean(np.linalg.norm(self.swarm - centroid, axis=1))
+        diff = np.subtract(self.swarm, centroid, out=self._tmp_buf)
+        diversity = np.sqrt(np.einsum('ij,ij->i', diff, diff)).mean()
         self.log["swarm_diversity"].append(diversity)
 
     def run(self):
@@ -220,7 +273,7 @@ class PSO:
         print(f"--- Starting PSO ({self.topology.upper()}) Optimization ---")
         for i in range(self.max_iter):
             # Evaluate fitness for all particles in a single batch
-            current_fitness = self.objective_func(self.swarm)
+            current_fitness = self._evaluate(self.swarm)
             
             # Update personal best
             update_mask = current_fitness < self.pbest_fitness
@@ -231,7 +284,9 @@ class PSO:
             current_gbest_idx = np.argmin(self.pbest_fitness)
             if self.pbest_fitness[current_gbest_idx] < self.gbest_fitness:
                 self.gbest_idx = current_gbest_idx
-                self.gbest_pos = self.pbest_pos[self.gbest_idx].copy()
+                # A row view is enough: row gbest_idx is only overwritten when that particle
+                # improves, and in the same step gbest is reassigned from the new pbest
+                self.gbest_pos = self.pbest_pos[self.gbest_idx]
                 self.gbest_fitness = self.pbest_fitness[self.gbest_idx]
 
             # Log results to CSV
@@ -249,8 +304,12 @@ class PSO:
             if (i + 1) % 10 == 0:
                 print(f"Iter {i+1}/{self.max_iter} | G-Best Fitness: {self.gbest_fitness:.4f} | Avg Fitness: {self.log['avg_fitness'][-1]:.4f} | Diversity: {self.log['swarm_diversity'][-1]:.2f}")
         
+        if self._csv_fh is not None:
+            self._csv_fh.flush()
+
         print("--- PSO Optimization Finished ---")
-        return self.gbest_pos, self.gbest_fitness, self.log
+        # Hand the caller its own copy rather than a view into pbest_pos
+        return self.gbest_pos.copy(), self.gbest_fitness, self.log
 
 if __name__ == '__main__':
     # Example usage with a simple mathematical function (Sphere function)
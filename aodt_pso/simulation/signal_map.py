@@ -1,7 +1,7 @@
 """
 Generates a 2D distribution of User Equipments (UEs) for the simulation.
 """
-from typing import List
+from typing import List, Tuple
 import numpy as np
 
 from ..aerial.dt import UE
@@ -9,8 +9,9 @@ from ..aerial.dt import UE
 def generate_ue_distribution(
     num_ues: int, 
     area_bounds: tuple, 
-    ue_height: float = 1.5
-) -> List[UE]:
+    ue_height: float = 1.5,
+    seed: int = None
+) -> Tuple[List[UE], np.ndarray]:
     """
     Generates a list of UE objects with random positions within a defined area.
 
@@ -22,24 +23,31 @@ def generate_ue_distribution(
         area_bounds (tuple): A tuple containing the min and max coordinates 
                              for x and y, e.g., (min_x, max_x, min_y, max_y).
         ue_height (float): The height (z-coordinate) for all UEs. Defaults to 1.5 meters.
+        seed (int, optional): Seed for the random number generator. Defaults to None.
 
     Returns:
-        List[UE]: A list of initialized UE objects.
+        Tuple[List[UE], np.ndarray]: A list of initialized UE objects and the same
+            positions stacked into a single (num_ues, 3) float32 array. Each UE's position
+            is a row view into that array.
     """
     min_x, max_x, min_y, max_y = area_bounds
     
     # Generate random x and y coordinates for each UE
-    x_coords = np.random.uniform(min_x, max_x, num_ues)
-    y_coords = np.random.uniform(min_y, max_y, num_ues)
+    rng = np.random.default_rng(seed)
+    x_coords = rng.uniform(min_x, max_x, num_ues)
+    y_coords = rng.uniform(min_y, max_y, num_ues)
     
+    # Store all positions in one (num_ues, 3) float32 array for vectorized consumers
+    ue_positions = np.empty((num_ues, 3), dtype=np.float32)
+    ue_positions[:, 0] = x_coords
+    ue_positions[:, 1] = y_coords
+    ue_positions[:, 2] = ue_height
+
     # Create a list of UE objects
-    ues = []
-    for i in range(num_ues):
-        position = np.array([x_coords[i], y_coords[i], ue_height])
-        ues.append(UE(position=position))
+    ues = [UE(position=position) for position in ue_positions]
         
     print(f"Generated {num_ues} UEs within area [({min_x}, {min_y}) to ({max_x}, {max_y})].")
-    return ues
+    return ues, ue_positions
 
 if __name__ == '__main__':
     # Example usage for testing
@@ -49,7 +57,7 @@ if __name__ == '__main__':
     AREA_BOUNDS = (0, 1000, 0, 1000)  # 1km x 1km area
     
     # Generate the UEs
-    user_equipments = generate_ue_distribution(
+    user_equipments, user_positions = generate_ue_distribution(
         num_ues=NUM_UES_TO_GENERATE,
         area_bounds=AREA_BOUNDS
     )
@@ -65,4 +73,5 @@ if __name__ == '__main__':
     first_ue_pos = user_equipments[0].position
     assert AREA_BOUNDS[0] <= first_ue_pos[0] <= AREA_BOUNDS[1]
     assert AREA_BOUNDS[2] <= first_ue_pos[1] <= AREA_BOUNDS[3]
+    assert user_positions.shape == (NUM_UES_TO_GENERATE, 3)
     print("\nAssertion passed: First UE is within the defined area bounds.") 
\ No newline at end of file
@@ -4,9 +4,8 @@ Provides 3D visualization capabilities for the AODT simulation results.
 This module uses the PyVista library to render a 3D scene showing the final
 positions of the Radio Units (RUs) and User Equipments (UEs).
 """
-from typing import List
+from typing import List, Union
 import numpy as np
-import pyvista as pv
 
 # Use a try-except block to handle running this file directly for testing
 try:
@@ -23,7 +22,19 @@ except (ImportError, ValueError):
     from aodt_pso.simulation.signal_map import generate_ue_distribution
 
 
-def plot_scene(rus: List[RU], ues: List[UE], area_bounds: tuple):
+def ue_positions_array(ues: Union[List[UE], np.ndarray]) -> np.ndarray:
+    """
+    Returns UE positions as a contiguous (N, 3) float32 array.
+
+    Accepts either the position array returned by `generate_ue_distribution`,
+    which is passed through without a copy when it is already float32, or a
+    list of UE objects, which is stacked once.
+    """
+    if isinstance(ues, np.ndarray):
+        return np.ascontiguousarray(ues, dtype=np.float32)
+    return np.array([ue.position for ue in ues], dtype=np.float32).reshape(-1, 3)
+
+def plot_scene(rus: List[RU], ues: Union[List[UE], np.ndarray], area_bounds: tuple):
     """
     Renders a 3D scene of the simulation environment using PyVista.
 
@@ -33,9 +44,14 @@ def plot_scene(rus: List[RU], ues: List[UE], area_bounds: tuple):
 
     Args:
         rus (List[RU]): List of optimized RU objects.
-        ues (List[UE]): List of UE objects in the scenario.
+        ues (Union[List[UE], np.ndarray]): UE objects in the scenario, or their
+            (N, 3) position array (preferred; avoids re-stacking the positions).
         area_bounds (tuple): The boundaries of the simulation area (min_x, max_x, min_y, max_y).
     """
+    # Imported here rather than at module level: loading VTK is slow, and
+    # importing this module should not pay for it unless something is plotted
+    import pyvista as pv
+
     min_x, max_x, min_y, max_y = area_bounds
     
     # Create a PyVista plotter
@@ -43,10 +59,20 @@ def plot_scene(rus: List[RU], ues: List[UE], area_bounds: tuple):
     plotter.set_background('white')
 
     # 1. Plot the User Equipments (UEs)
-    if ues:
-        ue_positions = np.array([ue.position for ue in ues])
-        plotter.add_points(
-            ue_positions,
+    ue_positions = ue_positions_array(ues)
+    if len(ue_positions):
+        # Build the vertex cells directly ([1, i] per point) instead of letting
+        # PolyData generate them from the raw point array
+        num_points = ue_positions.shape[0]
+        verts = np.empty(num_points * 2, dtype=pv.ID_TYPE)
+        verts[0::2] = 1
+        verts[1::2] = np.arange(num_points, dtype=pv.ID_TYPE)
+
+        ue_cloud = pv.PolyData()
+        ue_cloud.points = ue_positions
+        ue_cloud.verts = verts
+        plotter.add_mesh(
+            ue_cloud,
             color='blue',
             render_points_as_spheres=True,
             point_size=10,
@@ -55,28 +81,32 @@ def plot_scene(rus: List[RU], ues: List[UE], area_bounds: tuple):
 
     # 2. Plot the Radio Units (RUs)
     if rus:
-        for i, ru in enumerate(rus):
-            # Represent RU as a cone pointing downwards
-            cone = pv.Cone(
-                center=ru.position, 
-                direction=[0, 0, -1], 
-                height=10, 
-                radius=5
-            )
-            plotter.add_mesh(cone, color='red', label=f'RU-{i+1}')
-            
-            # Add a label with its configuration
-            label_pos = ru.position + np.array([0, 0, 15]) # Position label above the cone
-            freq = ru.antenna.freq
-            elements = ru.antenna.elements
-            plotter.add_point_labels(
-                label_pos, 
-                [f"RU-{i+1}\n{freq:.2f} GHz\n{elements} Elem."],
-                font_size=12,
-                text_color='black',
-                shape=None,
-                show_points=False
-            )
+        centers = np.asarray([ru.position for ru in rus], dtype=np.float64)
+
+        # Represent every RU as a cone pointing downwards, glyphed onto the RU
+        # centers so all cones end up in a single mesh (one actor). The 'ru_id'
+        # array is carried onto each cone's points, so individual RUs can still
+        # be told apart, e.g. for per-RU coloring with scalars='ru_id'.
+        ru_centers = pv.PolyData(centers)
+        ru_centers['ru_id'] = np.arange(1, len(rus) + 1)
+        cone = pv.Cone(direction=[0, 0, -1], height=10, radius=5)
+        cones = ru_centers.glyph(geom=cone, orient=False, scale=False)
+        plotter.add_mesh(cones, color='red', label='Radio Units (RUs)')
+        
+        # Add a label with each RU's configuration, all in one call
+        label_pos = centers + np.array([0, 0, 15]) # Position labels above the cones
+        labels = [
+            f"RU-{i+1}\n{ru.antenna.freq:.2f} GHz\n{ru.antenna.elements} Elem."
+            for i, ru in enumerate(rus)
+        ]
+        plotter.add_point_labels(
+            label_pos, 
+            labels,
+            font_size=12,
+            text_color='black',
+            shape=None,
+            show_points=False
+        )
 
     # 3. Plot the simulation area boundary
     bounds_box = pv.Box(bounds=[min_x, max_x, min_y, max_y, 0, 20])
@@ -115,12 +145,12 @@ if __name__ == '__main__':
     test_rus = [ru1, ru2]
 
     # Create mock UEs
-    test_ues = generate_ue_distribution(num_ues=NUM_UES_TEST, area_bounds=AREA_BOUNDS_TEST)
+    _, test_ue_positions = generate_ue_distribution(num_ues=NUM_UES_TEST, area_bounds=AREA_BOUNDS_TEST)
 
     print("\n--- 3D Plot Test ---")
     print("This test demonstrates the plotting function with mock data.")
     
     # Plot the scene
-    plot_scene(test_rus, test_ues, AREA_BOUNDS_TEST)
+    plot_scene(test_rus, test_ue_positions, AREA_BOUNDS_TEST)
     
     print("\nTest finished.") 
\ No newline at end of file
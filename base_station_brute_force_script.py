@@ -1,8 +1,66 @@
 import numpy as np
-from typing import List, Tuple, Dict
-import random
+from typing import Tuple, Dict
+import itertools
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
+# Mean and standard deviation of |X + iY| for X, Y ~ N(0, 1) (a Rayleigh variable).
+# Used to score placeholder CFRs without materializing them.
+_RAYLEIGH_MEAN = np.sqrt(np.pi / 2)
+_RAYLEIGH_STD = np.sqrt((4 - np.pi) / 2)
+
+# Fewest configurations worth starting worker processes for; below this the
+# pool's startup cost outweighs the evaluations it would parallelize
+_MIN_PARALLEL_CONFIGS = 16
+
+_mean_abs_pairs = None  # Numba kernel, built by _get_mean_abs_pairs on first use
+
+def _get_mean_abs_pairs():
+    """
+    Returns the Numba kernel for the mean magnitude of (re, im) float32 pairs,
+    or None if Numba is not installed.
+
+    Numba is imported here rather than at module level: it is slow to import and
+    only the real-CFR path of `evaluate_configuration` needs it.
+    """
+    global _mean_abs_pairs
+    if _mean_abs_pairs is None:
+        try:
+            from numba import njit, prange
+        except ImportError:
+            _mean_abs_pairs = False
+            return None
+
+        @njit(parallel=True, fastmath=True, cache=True)
+        def kernel(pairs: np.ndarray) -> float:
+            total = 0.0
+            for i in prange(pairs.shape[0]):
+                re = pairs[i, 0]
+                im = pairs[i, 1]
+                total += math.sqrt(re * re + im * im)
+            return total / pairs.shape[0]
+
+        _mean_abs_pairs = kernel
+    return _mean_abs_pairs or None
+
+def mean_abs_c64(cfrs: np.ndarray) -> float:
+    """
+    Computes np.abs(cfrs).mean() for a complex64 array.
+
+    With Numba the array is viewed as (re, im) float32 pairs and reduced in one
+    pass, without allocating the intermediate magnitude array.
+    """
+    cfrs = np.ascontiguousarray(cfrs, dtype=np.complex64)
+    kernel = _get_mean_abs_pairs()
+    if kernel is None:
+        return float(np.abs(cfrs).mean())
+    return kernel(cfrs.reshape(-1).view(np.float32).reshape(-1, 2))
+
 @dataclass
 class BuildingLocation:
     x: float
@@ -10,25 +68,65 @@ class BuildingLocation:
     z: float  # height
     id: str
 
-@dataclass
+@dataclass(slots=True)
 class Configuration:
-    ru_locations: List[Tuple[float, float, float]]
+    ru_locations: np.ndarray  # (num_rus, 3) array of x, y, z
     score: float = 0.0
 
 class AODTOptimizer:
-    def __init__(self, num_rus: int = 4, num_ues: int = 4):
+    def __init__(self, num_rus: int = 4, num_ues: int = 4, seed: int = 42, use_real_cfrs: bool = False,
+                 num_workers: int = 1):
         """
         Initialize the optimizer for AODT base station placement.
         
         Args:
             num_rus: Number of radio units to place
             num_ues: Number of user equipment to consider
+            seed: Seed for the random number generator used to simulate UEs
+            use_real_cfrs: Generate CFRs and feed them to the trainer. When False, the
+                placeholder throughput is sampled directly from its known distribution.
+            num_workers: Number of worker processes used to evaluate configurations
+                on the real-CFR path. Defaults to 1 (evaluate in this process). Workers
+                feed their own trainers, not this optimizer's trainer.
         """
         self.num_rus = num_rus
         self.num_ues = num_ues
+        self.use_real_cfrs = use_real_cfrs
+        self.num_workers = max(1, num_workers)
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
         self.buildings = []
+        self.building_xyz = np.empty((0, 3))
         self.best_configuration = None
         self.trainer = Trainer()  # From AODT API
+
+        # Scenario setup is identical for every configuration, so build it once
+        self._scenario_info = ScenarioInfo(
+            slot_symbol_mode=True,
+            batches=1,
+            slots_per_batch=10,
+            symbols_per_slot=14,
+            duration=1.0,
+            interval=0.1,
+            ue_min_speed_mps=0.0,
+            ue_max_speed_mps=3.0,
+            seeded_mobility=1,
+            seed=42,
+            scale=1.0,
+            ue_height_m=1.5
+        )
+        
+        self._ru_ue_info = RuUeInfo(
+            num_ues=self.num_ues,
+            num_rus=self.num_rus,
+            ue_pol=2,
+            ru_pol=2,
+            ants_per_ue=4,
+            ants_per_ru=4,
+            fft_size=256,
+            numerology=1
+        )
+        self._scenario_num_rus = None  # RU count the trainer scenario was last set up for
         
     def scan_buildings(self, scene_scale: float = 1.0):
         """
@@ -46,50 +144,56 @@ class AODTOptimizer:
             BuildingLocation(x=-200*scene_scale, y=200*scene_scale, z=38*scene_scale, id="building5"),
         ]
         
-    def evaluate_configuration(self, configuration: Configuration) -> float:
+        # Coordinates of every building as one (num_buildings, 3) array, so that
+        # configurations can be built by indexing instead of attribute lookups
+        self.building_xyz = np.asarray([[b.x, b.y, b.z] for b in self.buildings], dtype=np.float64)
+        
+    def evaluate_configuration(self, configuration: Configuration, rng: np.random.Generator = None) -> float:
         """
         Evaluate a specific RU placement configuration using AODT's channel prediction.
         
         Args:
             configuration: Configuration object containing RU locations
+            rng: Random number generator for the simulated UEs and placeholder
+                throughput. Defaults to the optimizer's own generator.
             
         Returns:
             float: Score representing the overall performance of this configuration
         """
-        # Initialize scenario
-        scenario_info = ScenarioInfo(
-            slot_symbol_mode=True,
-            batches=1,
-            slots_per_batch=10,
-            symbols_per_slot=14,
-            duration=1.0,
-            interval=0.1,
-            ue_min_speed_mps=0.0,
-            ue_max_speed_mps=3.0,
-            seeded_mobility=1,
-            seed=42,
-            scale=1.0,
-            ue_height_m=1.5
-        )
-        
-        ru_ue_info = RuUeInfo(
-            num_ues=self.num_ues,
-            num_rus=len(configuration.ru_locations),
-            ue_pol=2,
-            ru_pol=2,
-            ants_per_ue=4,
-            ants_per_ru=4,
-            fft_size=256,
-            numerology=1
-        )
-        
-        # Initialize training scenario
-        self.trainer.scenario(scenario_info, ru_ue_info)
+        if rng is None:
+            rng = self._rng
+
+        # Initialize training scenario, only when the RU count changes
+        num_rus = len(configuration.ru_locations)
+        if num_rus != self._scenario_num_rus:
+            self._ru_ue_info.num_rus = num_rus
+            self.trainer.scenario(self._scenario_info, self._ru_ue_info)
+            self._scenario_num_rus = num_rus
         
-        total_throughput = 0.0
+        num_time_steps = 10  # Simulate 10 time steps
+
+        if not self.use_real_cfrs:
+            # The placeholder CFRs are iid complex Gaussian, so the mean of |CFR| over
+            # all num_ues * 4 * 4 * 256 entries is approximately normal around the
+            # Rayleigh mean; sample it directly instead of generating the array
+            cfr_size = self.num_ues * 4 * 4 * 256
+            throughput_std = _RAYLEIGH_STD / np.sqrt(cfr_size)
+            noise = rng.standard_normal(num_time_steps)
+            return float(num_time_steps * _RAYLEIGH_MEAN + throughput_std * noise.sum())
+
+        # Simulate UE positions - in real implementation, would get from AODT.
+        # All time steps are drawn up front; the UEs are the same for every RU.
+        ue_xy = rng.uniform(-300, 300, (num_time_steps, self.num_ues, 2))
+        ue_speeds = rng.uniform(0, 3, (num_time_steps, self.num_ues))
+
+        # Get channel frequency responses from AODT for every time step at once,
+        # so the throughput is reduced in one pass instead of once per step
+        all_cfrs = rng.standard_normal(
+            (num_time_steps, self.num_ues, 4, 4, 256, 2), dtype=np.float32
+        ).view(np.complex64)[..., 0]  # Placeholder - would get real CFRs from AODT
         
         # Simulate multiple time steps
-        for time_step in range(10):  # Simulate 10 time steps
+        for time_step in range(num_time_steps):
             time_info = TimeInfo(
                 time_id=time_step,
                 batch_id=0,
@@ -97,47 +201,48 @@ class AODTOptimizer:
                 symbol_id=0
             )
             
+            ue_infos = [
+                UeInfo(
+                    ue_index=ue_idx,
+                    ue_id=f"ue_{ue_idx}",
+                    position_x=ue_xy[time_step, ue_idx, 0],
+                    position_y=ue_xy[time_step, ue_idx, 1],
+                    position_z=1.5,  # UE height
+                    speed_mps=ue_speeds[time_step, ue_idx]
+                )
+                for ue_idx in range(self.num_ues)
+            ]
+            
             # Create RU association info based on current configuration
-            ru_assoc_infos = []
-            for ru_idx, ru_loc in enumerate(configuration.ru_locations):
-                ue_infos = []
-                for ue_idx in range(self.num_ues):
-                    # Simulate UE positions - in real implementation, would get from AODT
-                    ue_info = UeInfo(
-                        ue_index=ue_idx,
-                        ue_id=f"ue_{ue_idx}",
-                        position_x=random.uniform(-300, 300),
-                        position_y=random.uniform(-300, 300),
-                        position_z=1.5,  # UE height
-                        speed_mps=random.uniform(0, 3)
-                    )
-                    ue_infos.append(ue_info)
-                
-                ru_assoc_info = RuAssocInfo(
+            ru_assoc_infos = [
+                RuAssocInfo(
                     ru_index=ru_idx,
                     ru_id=f"ru_{ru_idx}",
                     associated_ues=ue_infos
                 )
-                ru_assoc_infos.append(ru_assoc_info)
-            
-            # Get channel frequency responses from AODT
-            cfrs = np.random.complex64(
-                (self.num_ues, 4, 4, 256)
-            )  # Placeholder - would get real CFRs from AODT
+                for ru_idx in range(len(configuration.ru_locations))
+            ]
             
             # Append CFR and get training info
-            training_info = self.trainer.append_cfr(time_info, ru_assoc_infos, cfrs)
+            training_info = self.trainer.append_cfr(time_info, ru_assoc_infos, all_cfrs[time_step])
             
-            # Calculate throughput from CFRs
-            # In real implementation, would use proper channel capacity calculation
-            throughput = np.abs(cfrs).mean()
-            total_throughput += throughput
-            
-        return total_throughput
+        # Calculate throughput from CFRs: every step has the same number of
+        # entries, so the sum of per-step means is the overall mean times the steps.
+        # In real implementation, would use proper channel capacity calculation
+        return mean_abs_c64(all_cfrs) * num_time_steps
     
+    def combination_rng(self, building_indices: Tuple[int, ...]) -> np.random.Generator:
+        """Returns a generator seeded by the optimizer seed and a building combination."""
+        return np.random.default_rng([self.seed, *building_indices])
+
     def optimize(self, num_iterations: int = 100) -> Configuration:
         """
         Find optimal RU placement using random search.
+
+        If there are no more distinct building combinations than iterations, every
+        combination is evaluated exactly once instead. Each combination is scored
+        with its own seeded generator, so repeated draws of the same combination
+        are skipped rather than re-evaluated.
         
         Args:
             num_iterations: Number of random configurations to try
@@ -147,32 +252,82 @@ class AODTOptimizer:
         """
         best_score = float('-inf')
         best_configuration = None
+
+        num_buildings = len(self.buildings)
+        k = min(self.num_rus, num_buildings)
+        if math.comb(num_buildings, k) <= num_iterations:
+            candidates = itertools.combinations(range(num_buildings), k)
+        else:
+            # Draw every random combination at once: the k smallest of n uniform keys
+            # per row form a uniformly random k-subset of the buildings
+            keys = self._rng.random((num_iterations, num_buildings))
+            samples = np.sort(np.argpartition(keys, k - 1, axis=1)[:, :k], axis=1)
+            candidates = map(tuple, samples.tolist())
+
+        # Skip combinations that have already been scored
+        unique_indices = list(dict.fromkeys(candidates))
+        configs = [
+            Configuration(ru_locations=self.building_xyz[list(building_indices)])
+            for building_indices in unique_indices
+        ]
+
+        # Evaluate configurations, each with a generator tied to its combination.
+        # Processes are only worth it for many configurations on the real-CFR path;
+        # the analytic score takes microseconds. Workers only receive the RU
+        # coordinates and building indices.
+        num_workers = min(self.num_workers, len(configs))
+        if num_workers > 1 and self.use_real_cfrs and len(configs) >= _MIN_PARALLEL_CONFIGS:
+            # Spawn rather than fork: forking while Numba's worker threads are
+            # alive leaves the interpreter hanging at exit
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.num_rus, self.num_ues, self.seed, self.use_real_cfrs)
+            ) as pool:
+                scores = list(pool.map(_evaluate_in_worker, [c.ru_locations for c in configs], unique_indices))
+        else:
+            scores = [
+                self.evaluate_configuration(config, rng=self.combination_rng(building_indices))
+                for config, building_indices in zip(configs, unique_indices)
+            ]
         
-        for i in range(num_iterations):
-            # Randomly select buildings for RU placement
-            selected_buildings = random.sample(self.buildings, min(self.num_rus, len(self.buildings)))
-            
-            # Create configuration
-            config = Configuration(
-                ru_locations=[(b.x, b.y, b.z) for b in selected_buildings]
-            )
-            
-            # Evaluate configuration
-            score = self.evaluate_configuration(config)
+        # Improvements are collected and only formatted once the search is done
+        improvements = []
+        for eval_idx, (config, score) in enumerate(zip(configs, scores)):
             config.score = score
             
             # Update best configuration
             if score > best_score:
                 best_score = score
                 best_configuration = config
-                print(f"New best configuration found! Score: {best_score}")
-                print("RU Locations:")
-                for i, loc in enumerate(best_configuration.ru_locations):
-                    print(f"RU {i}: x={loc[0]}, y={loc[1]}, z={loc[2]}")
+                improvements.append((eval_idx, score, config.ru_locations))
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for eval_idx, score, ru_locations in improvements:
+                locations = "\n".join(
+                    f"RU {i}: x={loc[0]}, y={loc[1]}, z={loc[2]}" for i, loc in enumerate(ru_locations)
+                )
+                logger.debug("New best configuration found at evaluation %d! Score: %s\nRU Locations:\n%s",
+                             eval_idx, score, locations)
                     
         self.best_configuration = best_configuration
         return best_configuration
 
+# The AODT trainer is not process-safe, so every worker process builds its own
+# optimizer (and trainer) once and reuses it for all configurations it scores
+_worker_optimizer = None
+
+def _init_worker(num_rus: int, num_ues: int, seed: int, use_real_cfrs: bool):
+    global _worker_optimizer
+    _worker_optimizer = AODTOptimizer(
+        num_rus=num_rus, num_ues=num_ues, seed=seed, use_real_cfrs=use_real_cfrs, num_workers=1
+    )
+
+def _evaluate_in_worker(ru_locations: np.ndarray, building_indices: Tuple[int, ...]) -> float:
+    rng = _worker_optimizer.combination_rng(building_indices)
+    return _worker_optimizer.evaluate_configuration(Configuration(ru_locations=ru_locations), rng=rng)
+
 def main():
     # Initialize optimizer
     optimizer = AODTOptimizer(num_rus=4, num_ues=4)